@@ -1,13 +1,27 @@
 import os
 import json
+import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import discogs_client
+import ijson
 import logging
 import base64
 import time
-from fuzzywuzzy import fuzz
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from diskcache import Cache
+from rapidfuzz import fuzz, process, utils
 import jwt
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library json module is used without it
+    orjson = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -15,8 +29,18 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
 SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
 DEEZER_API_URL = "https://api.deezer.com/"
+DEEZER_ALBUM_SEARCH_URL = f"{DEEZER_API_URL}search/album"
+DEEZER_TRACK_SEARCH_URL = f"{DEEZER_API_URL}search/track"
+DEEZER_ARTIST_SEARCH_URL = f"{DEEZER_API_URL}search/artist"
+DEEZER_ALBUM_URL = f"{DEEZER_API_URL}album/{{}}"
+SPOTIFY_SEARCH_URL = "https://api.spotify.com/v1/search"
+SPOTIFY_ALBUM_TRACKS_URL = "https://api.spotify.com/v1/albums/{}/tracks"
+APPLE_MUSIC_SEARCH_URL = "https://api.music.apple.com/v1/catalog/de/search"
+APPLE_MUSIC_ALBUM_TRACKS_URL = "https://api.music.apple.com/v1/catalog/de/albums/{}/tracks"
+APPLE_MUSIC_BULK_TYPES = "albums,songs,artists"
 DISCOGS_API_TOKEN = os.getenv("DISCOGS_API_TOKEN")
 MUSICBRAINZ_API_URL = "https://musicbrainz.org/ws/2/"
+MUSICBRAINZ_RELEASE_URL = f"{MUSICBRAINZ_API_URL}release/"
 APPLE_MUSIC_KEY_ID = os.getenv("APPLE_MUSIC_KEY_ID")
 APPLE_MUSIC_TEAM_ID = os.getenv("APPLE_MUSIC_TEAM_ID")
 APPLE_MUSIC_PRIVATE_KEY_PATH = os.getenv("APPLE_MUSIC_PRIVATE_KEY_PATH")
@@ -27,78 +51,421 @@ TITLE_VARIANTS = [
     "Reissue", "Bonus Tracks", "Limited Edition", "Original", "Collector's Edition"
 ]
 ALBUM_TYPES = ["album", "ep", "compilation", "live"]
+# Separators between the artists of a joint release ("A & B", "A feat. B", "A vs. B", ...); the words only count
+# with a name on both sides, so band names such as "Little Feat" stay whole
+ARTIST_SEPARATORS = re.compile(r'\s*[&×]\s*|\s+(?:feat|featuring|ft|vs)\.?\s+', re.IGNORECASE)
+# Tracks fetched by the single artist track search that is tried before searching possible songs one by one (the Spotify maximum)
+ARTIST_TRACKS_LIMIT = 50
+
+# Lookup results are kept on disk so re-running on a partially enriched file skips the APIs
+CACHE_DIR = os.getenv("MUSIC_LINKS_CACHE_DIR", ".music_links_cache")
+CACHE_TTL = 30 * 24 * 60 * 60  # 30 days
+_CACHE = Cache(CACHE_DIR)
+_CACHE_MISS = object()
+
+def _create_session() -> requests.Session:
+    """Create a pooled session so connections (and their TLS handshakes) are reused across requests to the same host."""
+    session = requests.Session()
+    # Transient server errors and dropped connections are retried here; 429s are left to api_get,
+    # which pauses every request to the throttling API rather than just the one that was rejected.
+    # Once the retries are used up the last response is returned, so the callers' status checks handle it
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504], raise_on_status=False)
+    session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retries))
+    session.headers.update({"User-Agent": "music_links_enricher (https://github.com/dcschmid/music_links_enricher)"})
+    return session
+
+_SESSION = _create_session()
+# Spotify gets its own session so the bearer token is attached once as a default header
+_SPOTIFY_SESSION = _create_session()
+_SPOTIFY_TOKEN = {"token": None, "expires_at": 0.0, "retry_at": 0.0}
+# Seconds to wait after a failed Spotify authentication before trying again
+SPOTIFY_AUTH_RETRY_DELAY = 300
+_spotify_token_lock = threading.Lock()
+_APPLE_MUSIC_TOKEN = {"token": None, "expires_at": 0.0}
+_apple_music_token_lock = threading.Lock()
+APPLE_MUSIC_TOKEN_TTL = 3600
+
+class RateLimiter:
+    """Allows at most `calls` requests per `period` seconds and `max_concurrent` requests in flight to one API.
+
+    Use it as a context manager around a request; it blocks only once one of those budgets is used up.
+    """
+
+    def __init__(self, calls: int, period: float = 1.0, max_concurrent: int = 4):
+        self.calls = calls
+        self.period = period
+        self._timestamps = deque()
+        self._lock = threading.Lock()
+        self._in_flight = threading.BoundedSemaphore(max_concurrent)
+        self._paused_until = 0.0
+
+    def __enter__(self):
+        self._in_flight.acquire()
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._in_flight.release()
+
+    def acquire(self) -> None:
+        """Block until another request fits into the current window and the API is not paused."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    while self._timestamps and now - self._timestamps[0] >= self.period:
+                        self._timestamps.popleft()
+                    if len(self._timestamps) < self.calls:
+                        self._timestamps.append(now)
+                        return
+                    wait = self.period - (now - self._timestamps[0])
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every request to this API for the given number of seconds, e.g. after a 429 response."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+# One limiter per API, shared by all worker threads
+SPOTIFY_RATE_LIMITER = RateLimiter(10, 1.0)
+DEEZER_RATE_LIMITER = RateLimiter(50, 5.0)
+APPLE_MUSIC_RATE_LIMITER = RateLimiter(20, 1.0)
+MUSICBRAINZ_RATE_LIMITER = RateLimiter(1, 1.0, max_concurrent=1)
+
+# Parsed successful GET responses by (URL, query params). The identical searches this serves come from the link and
+# preview lookups of the same album, and only a few albums are in flight at once, so the cache stays small
+RESPONSE_CACHE_SIZE = 256
+_RESPONSE_CACHE = {}
+_response_cache_lock = threading.Lock()
+# Per thread, whether a request failed (network error, 5xx, rejected credentials) during the current cached lookup,
+# so a result that only reflects an outage is not stored on disk
+_lookup_state = threading.local()
+
+class CachedResponse:
+    """The status code and parsed body of a successful response, kept instead of the whole requests.Response."""
+    __slots__ = ("status_code", "data")
+
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.data = data
+
+def api_get(limiter, url, session=_SESSION, **kwargs):
+    """Send a GET request within the API's rate limit, waiting out 429 responses and reusing identical earlier requests."""
+    key = (url, tuple(sorted((kwargs.get("params") or {}).items())))
+    with _response_cache_lock:
+        if key in _RESPONSE_CACHE:
+            return _RESPONSE_CACHE[key]
+
+    for _ in range(3):
+        with limiter:
+            try:
+                response = session.get(url, **kwargs)
+            except requests.RequestException:
+                _lookup_state.failed = True
+                raise
+        if response.status_code != 429:
+            break
+        try:
+            retry_after = float(response.headers.get("Retry-After", 1))
+        except ValueError:
+            retry_after = 1.0
+        logging.warning(f"Rate limited by {url}, pausing requests to this API for {retry_after}s")
+        limiter.pause(retry_after)
 
-def rate_limit(delay: float = 2.0) -> None:
-    """Introduce a delay before executing the next function call to avoid hitting the rate limit for various APIs."""
-    time.sleep(delay)
+    if response.status_code == 200:
+        response = CachedResponse(response.status_code, response_json(response))
+        with _response_cache_lock:
+            _RESPONSE_CACHE[key] = response
+            if len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+                del _RESPONSE_CACHE[next(iter(_RESPONSE_CACHE))]
+    elif response.status_code != 404:
+        _lookup_state.failed = True
+    return response
+
+def response_json(response):
+    """Parse a response body, using orjson when it is installed."""
+    if isinstance(response, CachedResponse):
+        return response.data
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
 
 def clean_artist_name(artist: str) -> str:
     """Clean the artist's name by removing any text after a question mark or other unwanted characters."""
     return artist.split('?')[0].strip()
 
-def fuzzy_match(target, candidate, threshold=85):
-    """Compares the target string against the candidate string and returns True if the fuzzy match ratio between the two strings exceeds the specified threshold."""
-    return fuzz.token_sort_ratio(target, candidate) >= threshold or target.lower() in candidate.lower()
+def cached_lookup(name):
+    """Cache a per-album lookup on disk, keyed by API name, cleaned artist, and album title.
+
+    Pass cache_result=False when the lookup's inputs came from a lookup that failed, so its result is not stored either.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(artist, album, *args, cache_result=True, **kwargs):
+            key = f"{name}:{clean_artist_name(artist).lower()}:{album.lower()}"
+            result = _CACHE.get(key, default=_CACHE_MISS)
+            if result is _CACHE_MISS:
+                outer_failed = getattr(_lookup_state, "failed", False)
+                _lookup_state.failed = False
+                try:
+                    result = func(artist, album, *args, **kwargs)
+                    failed = _lookup_state.failed
+                finally:
+                    _lookup_state.failed = outer_failed or _lookup_state.failed
+                # Only results every request answered are kept, so outages and bad credentials are retried next run
+                if cache_result and not failed:
+                    _CACHE.set(key, result, expire=CACHE_TTL)
+            return result
+        return wrapper
+    return decorator
+
+def tracked_lookup(func, *args, **kwargs):
+    """Run a lookup and return its result together with whether any of its requests failed."""
+    _lookup_state.failed = False
+    result = func(*args, **kwargs)
+    return result, _lookup_state.failed
+
+@lru_cache(maxsize=256)
+def split_artists(artist: str) -> tuple[str, ...]:
+    """Split a joint artist credit into the individual artist names."""
+    names = tuple(name.strip() for name in ARTIST_SEPARATORS.split(artist) if name.strip())
+    return names or (artist.strip(),)
+
+@lru_cache(maxsize=256)
+def title_variants(album: str) -> tuple[str, ...]:
+    """Return the album title followed by its common edition variants ("Deluxe", "Remastered", ...)."""
+    return (album, *(f"{album} {suffix}" for suffix in TITLE_VARIANTS))
+
+def unique_songs(songs):
+    """Drop case-insensitive duplicates from a list of song titles, keeping the original order."""
+    return list({song.lower(): song for song in songs}.values())
+
+@lru_cache(maxsize=4096)
+def _norm(s: str) -> str:
+    """Return the processed (lowercased, punctuation-free) form of a string so repeated comparisons against it skip re-processing."""
+    return utils.default_process(s)
+
+def fuzzy_scores(target, candidates, threshold=85):
+    """Map the index of every candidate that fuzzy matches the target to its score, scoring the whole list in one call."""
+    query = _norm(target)
+    processed = [_norm(c) for c in candidates]
+    scores = {}
+    rest = []
+    for index, candidate in enumerate(processed):
+        # A candidate containing the query passes without the scorer; for a substring the similarity is just
+        # the length ratio, so an exact match scores 100 and outranks longer titles such as "... (Super Deluxe)"
+        if query and query in candidate:
+            scores[index] = max(threshold, 200 * len(query) / (len(query) + len(candidate)))
+        else:
+            rest.append(index)
+    # token_sort_ratio tolerates reordered words but, unlike token_set_ratio, still penalizes missing ones ("Leon" vs "Kings of Leon")
+    matches = process.extract(query, [processed[index] for index in rest], scorer=fuzz.token_sort_ratio, processor=None, score_cutoff=threshold, limit=None)
+    scores.update({rest[position]: score for _, score, position in matches})
+    return scores
+
+def match_releases(album, artist, titles, artists, album_threshold=85, artist_threshold=85):
+    """Return the indices of search results whose title and artist both fuzzy match, best combined score first."""
+    album_scores = fuzzy_scores(album, titles, album_threshold)
+    # Only results whose title already passed need their artist scored
+    candidates = list(album_scores)
+    artist_scores = fuzzy_scores(artist, [artists[index] for index in candidates], artist_threshold)
+    combined = {candidates[position]: album_scores[candidates[position]] + score for position, score in artist_scores.items()}
+    return sorted(combined, key=lambda index: (-combined[index], index))
+
+def find_song_preview(tracks, possible_songs, name_key, preview_key):
+    """Return the first track with a preview whose processed title is one of the possible songs."""
+    wanted = {_norm(song) for song in possible_songs}
+    return next((track for track in tracks if track.get(preview_key) and _norm(track[name_key]) in wanted), None)
 
 def authenticate_spotify() -> str | None:
-    """Authenticate with Spotify using client ID and secret."""
+    """Authenticate with Spotify using client ID and secret and attach the new token to the Spotify session."""
     auth_url = "https://accounts.spotify.com/api/token"
     auth_header = base64.b64encode(f"{SPOTIFY_CLIENT_ID}:{SPOTIFY_CLIENT_SECRET}".encode()).decode()
     headers = {"Authorization": f"Basic {auth_header}"}
     data = {"grant_type": "client_credentials"}
-    response = requests.post(auth_url, headers=headers, data=data)
+    try:
+        response = _SESSION.post(auth_url, headers=headers, data=data)
+    except requests.RequestException as e:
+        logging.error(f"Spotify authentication failed: {e}, retrying in {SPOTIFY_AUTH_RETRY_DELAY}s")
+        _SPOTIFY_TOKEN["token"] = None
+        _SPOTIFY_TOKEN["retry_at"] = time.time() + SPOTIFY_AUTH_RETRY_DELAY
+        return None
     if response.status_code == 200:
-        return response.json().get("access_token")
-    logging.error(f"Spotify authentication failed: {response.status_code} - {response.text}")
+        auth_data = response_json(response)
+        token = auth_data.get("access_token")
+        _SPOTIFY_TOKEN["token"] = token
+        _SPOTIFY_TOKEN["expires_at"] = time.time() + auth_data.get("expires_in", 3600)
+        _SPOTIFY_SESSION.headers.update({"Authorization": f"Bearer {token}"})
+        return token
+    logging.error(f"Spotify authentication failed: {response.status_code} - {response.text}, retrying in {SPOTIFY_AUTH_RETRY_DELAY}s")
+    _SPOTIFY_TOKEN["token"] = None
+    _SPOTIFY_TOKEN["retry_at"] = time.time() + SPOTIFY_AUTH_RETRY_DELAY
     return None
 
-def authenticate_apple_music() -> str:
-    """Generate a JWT for Apple Music API authentication."""
+def get_spotify_token(force_refresh: bool = False) -> str | None:
+    """Return the cached Spotify token, re-authenticating when it is about to expire or has been rejected."""
+    with _spotify_token_lock:
+        # After a failed authentication every request would try again, so wait before the next attempt
+        if time.time() < _SPOTIFY_TOKEN["retry_at"]:
+            return _SPOTIFY_TOKEN["token"]
+        if force_refresh or _SPOTIFY_TOKEN["token"] is None or time.time() >= _SPOTIFY_TOKEN["expires_at"] - 60:
+            return authenticate_spotify()
+        return _SPOTIFY_TOKEN["token"]
+
+def spotify_get(url, params=None):
+    """Send a GET request to the Spotify Web API, refreshing the token and retrying once on a 401."""
+    if get_spotify_token() is None:
+        _lookup_state.failed = True
+    failed = getattr(_lookup_state, "failed", False)
+    response = api_get(SPOTIFY_RATE_LIMITER, url, session=_SPOTIFY_SESSION, params=params)
+    if response.status_code == 401 and get_spotify_token(force_refresh=True) is not None:
+        logging.info("Spotify token rejected, retrying with a new token")
+        # Only the retry with the new token decides whether the request failed
+        _lookup_state.failed = failed
+        response = api_get(SPOTIFY_RATE_LIMITER, url, session=_SPOTIFY_SESSION, params=params)
+    return response
+
+@lru_cache(maxsize=1)
+def load_apple_music_private_key() -> str:
+    """Read the Apple Music private key once per run."""
     with open(APPLE_MUSIC_PRIVATE_KEY_PATH, 'r') as f:
-        private_key = f.read()
+        return f.read()
 
+def authenticate_apple_music() -> str:
+    """Generate a JWT for Apple Music API authentication and cache it until it expires."""
+    issued_at = int(time.time())
     headers = {'alg': 'ES256', 'kid': APPLE_MUSIC_KEY_ID}
-    payload = {'iss': APPLE_MUSIC_TEAM_ID, 'iat': int(time.time()), 'exp': int(time.time()) + 3600}
-
-    token = jwt.encode(payload, private_key, algorithm='ES256', headers=headers)
-
-    return token.decode('utf-8') if isinstance(token, bytes) else token
+    payload = {'iss': APPLE_MUSIC_TEAM_ID, 'iat': issued_at, 'exp': issued_at + APPLE_MUSIC_TOKEN_TTL}
+
+    token = jwt.encode(payload, load_apple_music_private_key(), algorithm='ES256', headers=headers)
+    token = token.decode('utf-8') if isinstance(token, bytes) else token
+    _APPLE_MUSIC_TOKEN["token"] = token
+    _APPLE_MUSIC_TOKEN["expires_at"] = issued_at + APPLE_MUSIC_TOKEN_TTL
+    return token
+
+def get_apple_music_token() -> str:
+    """Return the cached Apple Music JWT, signing a new one when it is about to expire."""
+    with _apple_music_token_lock:
+        if _APPLE_MUSIC_TOKEN["token"] is None or time.time() >= _APPLE_MUSIC_TOKEN["expires_at"] - 60:
+            return authenticate_apple_music()
+        return _APPLE_MUSIC_TOKEN["token"]
+
+@cached_lookup("musicbrainz")
+def search_musicbrainz_for_album(artist, album):
+    """Fetch an album's tracklist from MusicBrainz with one release search and one release lookup including its recordings."""
+    artist_query = clean_artist_name(artist).replace('"', '\\"')
+    album_query = album.replace('"', '\\"')
+    params = {"query": f'artist:"{artist_query}" AND release:"{album_query}"', "fmt": "json", "limit": 1}
+    try:
+        response = api_get(MUSICBRAINZ_RATE_LIMITER, MUSICBRAINZ_RELEASE_URL, params=params)
+        if response.status_code != 200:
+            logging.error(f"MusicBrainz release search failed for '{artist}' - '{album}': {response.status_code}")
+            return []
+
+        releases = response_json(response).get('releases', [])
+        if not releases:
+            logging.info(f"No MusicBrainz release found for '{artist}' - '{album}'")
+            return []
+
+        # A single lookup with inc=recordings returns the full tracklist of every medium
+        response = api_get(MUSICBRAINZ_RATE_LIMITER, MUSICBRAINZ_RELEASE_URL + releases[0]['id'], params={"inc": "recordings", "fmt": "json"})
+        if response.status_code != 200:
+            logging.error(f"MusicBrainz release lookup failed for '{artist}' - '{album}': {response.status_code}")
+            return []
+
+        tracks = [track['title'] for medium in response_json(response).get('media', []) for track in medium.get('tracks', [])]
+        logging.info(f"Found {len(tracks)} MusicBrainz tracks for '{artist}' - '{album}'")
+        return tracks
+    except Exception as e:
+        logging.error(f"Error fetching MusicBrainz tracks for '{artist}' - '{album}': {e}")
+        return []
+
+# Album tracklists don't change during a run, so link and preview lookups share them:
+# album id -> (track names, first available preview URL)
+_SPOTIFY_ALBUM_CACHE: dict[str, tuple[list[str], str | None]] = {}
+_DEEZER_ALBUM_CACHE: dict[int, tuple[list[str], str | None]] = {}
+# Artist page links by (API, lowercased artist name), the shared fallback for all albums of an artist
+_ARTIST_LINK_CACHE: dict[tuple[str, str], str | None] = {}
+# (API, lowercased artist, lowercased album) whose plain title album search came back empty; the title variants only
+# narrow that search, so the link and preview lookups skip them
+_NO_ALBUM_RESULTS: set[tuple[str, str, str]] = set()
+
+def fetch_spotify_album_tracks(album_id) -> tuple[list[str], str | None] | None:
+    """Return the track names and first preview URL of a Spotify album, fetching them only once per album."""
+    if album_id not in _SPOTIFY_ALBUM_CACHE:
+        response = spotify_get(SPOTIFY_ALBUM_TRACKS_URL.format(album_id))
+        if response.status_code != 200:
+            return None
+        tracks = response_json(response)['items']
+        preview_url = next((track['preview_url'] for track in tracks if track.get('preview_url')), None)
+        _SPOTIFY_ALBUM_CACHE[album_id] = ([track['name'] for track in tracks], preview_url)
+    return _SPOTIFY_ALBUM_CACHE[album_id]
+
+def fetch_deezer_album_tracks(album_id) -> tuple[list[str], str | None] | None:
+    """Return the track titles and first preview URL of a Deezer album, fetching them only once per album."""
+    if album_id not in _DEEZER_ALBUM_CACHE:
+        response = api_get(DEEZER_RATE_LIMITER, DEEZER_ALBUM_URL.format(album_id))
+        if response.status_code != 200:
+            return None
+        tracks = response_json(response)['tracks']['data']
+        preview_url = next((track['preview'] for track in tracks if track.get('preview')), None)
+        _DEEZER_ALBUM_CACHE[album_id] = ([track['title'] for track in tracks], preview_url)
+    return _DEEZER_ALBUM_CACHE[album_id]
 
 def get_apple_music_preview(artist, album, possible_songs, token):
     """Search for an album or song preview URL on Apple Music with album variants."""
-    url = f"https://api.music.apple.com/v1/catalog/de/search"
     headers = {"Authorization": f"Bearer {token}"}
 
     # Try album preview using variants
-    for variant in [album] + [f"{album} {suffix}" for suffix in TITLE_VARIANTS]:
-        params = {'term': f'{artist} {variant}', 'types': 'albums', 'limit': 1}
-        response = requests.get(url, headers=headers, params=params)
-        rate_limit()
+    params = {'limit': 1}
+    bulk_results = {}
+    no_results_key = ("apple_music", artist.lower(), album.lower())
+    for variant in title_variants(album):
+        # The plain title is still searched, as its songs and artists are needed below
+        if variant != album and no_results_key in _NO_ALBUM_RESULTS:
+            break
+        # The plain title search also returns songs and artists, so the fallbacks below rarely need requests of their own
+        params['types'] = APPLE_MUSIC_BULK_TYPES if variant == album else 'albums'
+        params['term'] = f'{artist} {variant}'
+        response = api_get(APPLE_MUSIC_RATE_LIMITER, APPLE_MUSIC_SEARCH_URL, headers=headers, params=params)
 
         if response.status_code == 200:
-            data = response.json()
+            data = response_json(response)
+            if variant == album:
+                bulk_results = data['results']
+                if not bulk_results.get('albums', {}).get('data'):
+                    _NO_ALBUM_RESULTS.add(no_results_key)
             if 'albums' in data['results'] and data['results']['albums']['data']:
                 album_data = data['results']['albums']['data'][0]
                 album_id = album_data['id']
 
                 # Fetch album tracks to get previews
-                album_tracks_response = requests.get(f"https://api.music.apple.com/v1/catalog/de/albums/{album_id}/tracks", headers=headers)
+                album_tracks_response = api_get(APPLE_MUSIC_RATE_LIMITER, APPLE_MUSIC_ALBUM_TRACKS_URL.format(album_id), headers=headers)
                 if album_tracks_response.status_code == 200:
-                    album_tracks_data = album_tracks_response.json()
+                    album_tracks_data = response_json(album_tracks_response)
                     for track in album_tracks_data['data']:
                         if 'previews' in track['attributes'] and track['attributes']['previews']:
                             preview_url = track['attributes']['previews'][0]['url']
                             logging.info(f"Found Apple Music album preview for track: {track['attributes']['name']} - {preview_url}")
                             return preview_url
 
-    # If no album preview, try to get a song preview
+    # If no album preview, try to get a song preview, starting with the song found by the plain title search
+    if 'songs' in bulk_results and bulk_results['songs']['data']:
+        song_data = bulk_results['songs']['data'][0]
+        if 'previews' in song_data['attributes'] and song_data['attributes']['previews']:
+            preview_url = song_data['attributes']['previews'][0]['url']
+            logging.info(f"Found Apple Music song preview: {song_data['attributes']['name']} - {preview_url}")
+            return preview_url
+
+    params = {'types': 'songs', 'limit': 1}
     for song in possible_songs:
-        params = {'term': f'{artist} {song}', 'types': 'songs', 'limit': 1}
-        response = requests.get(url, headers=headers, params=params)
-        rate_limit()
+        params['term'] = f'{artist} {song}'
+        response = api_get(APPLE_MUSIC_RATE_LIMITER, APPLE_MUSIC_SEARCH_URL, headers=headers, params=params)
 
         if response.status_code == 200:
-            data = response.json()
+            data = response_json(response)
             if 'songs' in data['results'] and data['results']['songs']['data']:
                 song_data = data['results']['songs']['data'][0]
                 if 'previews' in song_data['attributes'] and song_data['attributes']['previews']:
@@ -114,36 +481,44 @@ def get_deezer_preview(artist, album, possible_songs):
     """Search for an album or song preview URL on Deezer."""
     deezer_tracks = []
 
-    # Deezer API URL
-    DEEZER_API_URL = "https://api.deezer.com"
+    artist_query = f'artist:"{artist}"'
+    no_results_key = ("deezer", artist.lower(), album.lower())
 
     # Search for album using variants
-    for variant in [album] + [f"{album} {suffix}" for suffix in TITLE_VARIANTS]:
-        response = requests.get(f"{DEEZER_API_URL}/search/album?q=artist:'{artist}' album:'{variant}'")
-        rate_limit()
+    for variant in title_variants(album):
+        if no_results_key in _NO_ALBUM_RESULTS:
+            break
+        response = api_get(DEEZER_RATE_LIMITER, DEEZER_ALBUM_SEARCH_URL, params={"q": f'{artist_query} album:"{variant}"'})
 
         if response.status_code == 200:
-            data = response.json()
+            data = response_json(response)
+            if variant == album and not data.get('data'):
+                _NO_ALBUM_RESULTS.add(no_results_key)
             if 'data' in data and data['data']:
                 album_data = data['data'][0]  # Take the first matching album
                 album_id = album_data['id']
 
                 # Get the album's tracklist to find previews
-                album_tracks_response = requests.get(f"{DEEZER_API_URL}/album/{album_id}/tracks")
-                if album_tracks_response.status_code == 200:
-                    album_tracks_data = album_tracks_response.json()
-                    for track in album_tracks_data['data']:
-                        if 'preview' in track and track['preview']:
-                            logging.info(f"Found Deezer album preview for track: {track['title']} - {track['preview']}")
-                            return track['preview']
+                album_tracks = fetch_deezer_album_tracks(album_id)
+                if album_tracks is not None and album_tracks[1]:
+                    logging.info(f"Found Deezer album preview for album {album_id}: {album_tracks[1]}")
+                    return album_tracks[1]
+
+    # If no album preview found, look for the songs among the artist's tracks, which takes one search instead of one per song
+    if possible_songs:
+        response = api_get(DEEZER_RATE_LIMITER, DEEZER_TRACK_SEARCH_URL, params={"q": artist_query, "limit": ARTIST_TRACKS_LIMIT})
+        if response.status_code == 200:
+            track_data = find_song_preview(response_json(response).get('data', []), possible_songs, 'title', 'preview')
+            if track_data:
+                logging.info(f"Found Deezer song preview: {track_data['title']} - {track_data['preview']}")
+                return track_data['preview']
 
-    # If no album preview found, search for individual tracks
+    # Search for the songs one by one if the artist's tracks did not include them
     for song in possible_songs:
-        response = requests.get(f"{DEEZER_API_URL}/search/track?q=artist:'{artist}' track:'{song}'")
-        rate_limit()
+        response = api_get(DEEZER_RATE_LIMITER, DEEZER_TRACK_SEARCH_URL, params={"q": f'{artist_query} track:"{song}"'})
 
         if response.status_code == 200:
-            data = response.json()
+            data = response_json(response)
             if 'data' in data and data['data']:
                 track_data = data['data'][0]  # Take the first matching track
                 if 'preview' in track_data and track_data['preview']:
@@ -154,39 +529,48 @@ def get_deezer_preview(artist, album, possible_songs):
     return None
 
 
-def get_spotify_preview(artist, album, possible_songs, spotify_token):
+def get_spotify_preview(artist, album, possible_songs):
     """Search for an album or song preview URL on Spotify."""
-    headers = {"Authorization": f"Bearer {spotify_token}"}
-    search_url = "https://api.spotify.com/v1/search"
     spotify_tracks = []
 
     # Search for album using variants
-    for variant in [album] + [f"{album} {suffix}" for suffix in TITLE_VARIANTS]:
-        params = {"q": f"album:{variant} artist:{artist}", "type": "album", "limit": 1}
-        response = requests.get(search_url, headers=headers, params=params)
-        rate_limit()
+    params = {"type": "album", "limit": 1}
+    no_results_key = ("spotify", artist.lower(), album.lower())
+    for variant in title_variants(album):
+        if no_results_key in _NO_ALBUM_RESULTS:
+            break
+        params["q"] = f"album:{variant} artist:{artist}"
+        response = spotify_get(SPOTIFY_SEARCH_URL, params=params)
 
         if response.status_code == 200:
-            data = response.json()
+            data = response_json(response)
+            if variant == album and not data['albums']['items']:
+                _NO_ALBUM_RESULTS.add(no_results_key)
             if data['albums']['items']:
                 album_id = data['albums']['items'][0]['id']
-                album_tracks_response = requests.get(f"https://api.spotify.com/v1/albums/{album_id}/tracks", headers=headers)
+                album_tracks = fetch_spotify_album_tracks(album_id)
 
-                if album_tracks_response.status_code == 200:
-                    album_tracks_data = album_tracks_response.json()
-                    for track in album_tracks_data['items']:
-                        if 'preview_url' in track and track['preview_url']:
-                            logging.info(f"Found Spotify album preview for track: {track['name']} - {track['preview_url']}")
-                            return track['preview_url']  # Return the first available preview
+                if album_tracks is not None and album_tracks[1]:
+                    logging.info(f"Found Spotify album preview for album {album_id}: {album_tracks[1]}")
+                    return album_tracks[1]  # Return the first available preview
+
+    # If no album preview found, look for the songs among the artist's tracks, which takes one search instead of one per song
+    if possible_songs:
+        response = spotify_get(SPOTIFY_SEARCH_URL, params={"type": "track", "q": f"artist:{artist}", "limit": ARTIST_TRACKS_LIMIT})
+        if response.status_code == 200:
+            track = find_song_preview(response_json(response)['tracks']['items'], possible_songs, 'name', 'preview_url')
+            if track:
+                logging.info(f"Found Spotify song preview: {track['name']} - {track['preview_url']}")
+                return track['preview_url']
 
-    # If no album preview found, search for individual tracks
+    # Search for the songs one by one if the artist's tracks did not include them
+    params = {"type": "track", "limit": 1}
     for song in possible_songs:
-        params = {"q": f"track:{song} artist:{artist}", "type": "track", "limit": 1}
-        response = requests.get(search_url, headers=headers, params=params)
-        rate_limit()
+        params["q"] = f"track:{song} artist:{artist}"
+        response = spotify_get(SPOTIFY_SEARCH_URL, params=params)
 
         if response.status_code == 200:
-            data = response.json()
+            data = response_json(response)
             if data['tracks']['items']:
                 track = data['tracks']['items'][0]
                 if 'preview_url' in track and track['preview_url']:
@@ -197,39 +581,51 @@ def get_spotify_preview(artist, album, possible_songs, spotify_token):
     return None
 
 
-def get_music_preview_link(artist, album, possible_songs, apple_music_token, spotify_token):
-    """Get music preview from Apple Music, Deezer, or Spotify, in that order."""
+@cached_lookup("preview")
+def get_music_preview_link(artist, album, possible_songs, apple_music_token, deezer_preview=None, spotify_preview=None):
+    """Get music preview from Apple Music, Deezer, or Spotify, in that order, reusing previews the link lookups already found."""
     # Try Apple Music (album, song, artist)
     preview_url = get_apple_music_preview(artist, album, possible_songs, apple_music_token)
     if preview_url:
         return preview_url
 
     # Try Deezer (album, song, artist)
-    preview_url = get_deezer_preview(artist, album, possible_songs)
+    preview_url = deezer_preview or get_deezer_preview(artist, album, possible_songs)
     if preview_url:
         return preview_url
 
     # Try Spotify (album, song, artist)
-    preview_url = get_spotify_preview(artist, album, possible_songs, spotify_token)
+    preview_url = spotify_preview or get_spotify_preview(artist, album, possible_songs)
     if preview_url:
         return preview_url
 
     logging.info("No preview link found on Apple Music, Deezer, or Spotify.")
     return None
 
+@cached_lookup("apple_music_link")
 def get_apple_music_link(artist, album, possible_songs, token):
     """Search for an album, track, or artist on Apple Music and return the link."""
-    url = f"https://api.music.apple.com/v1/catalog/de/search"
     headers = {"Authorization": f"Bearer {token}"}
 
     # Search for album using variants
-    for variant in [album] + [f"{album} {suffix}" for suffix in TITLE_VARIANTS]:
-        params = {'term': f'{artist} {variant}', 'types': 'albums', 'limit': 1}
-        response = requests.get(url, headers=headers, params=params)
-        rate_limit()
+    params = {'limit': 1}
+    bulk_results = {}
+    no_results_key = ("apple_music", artist.lower(), album.lower())
+    for variant in title_variants(album):
+        # The plain title is still searched, as its songs and artists are needed below
+        if variant != album and no_results_key in _NO_ALBUM_RESULTS:
+            break
+        # The plain title search also returns songs and artists, so the fallbacks below rarely need requests of their own
+        params['types'] = APPLE_MUSIC_BULK_TYPES if variant == album else 'albums'
+        params['term'] = f'{artist} {variant}'
+        response = api_get(APPLE_MUSIC_RATE_LIMITER, APPLE_MUSIC_SEARCH_URL, headers=headers, params=params)
 
         if response.status_code == 200:
-            data = response.json()
+            data = response_json(response)
+            if variant == album:
+                bulk_results = data['results']
+                if not bulk_results.get('albums', {}).get('data'):
+                    _NO_ALBUM_RESULTS.add(no_results_key)
             if 'albums' in data['results'] and data['results']['albums']['data']:
                 album_data = data['results']['albums']['data'][0]
                 album_url = album_data['attributes']['url']
@@ -238,14 +634,20 @@ def get_apple_music_link(artist, album, possible_songs, token):
                 logging.info(f"Found Apple Music album: {album_name} by {artist_name} - {album_url}")
                 return album_url
 
-    # If no album found, search for individual tracks from possible_songs
+    # If no album found, use the song found by the plain title search, then search for individual tracks from possible_songs
+    if 'songs' in bulk_results and bulk_results['songs']['data']:
+        song_data = bulk_results['songs']['data'][0]
+        song_url = song_data['attributes']['url']
+        logging.info(f"Found Apple Music song: {song_data['attributes']['name']} by {artist} - {song_url}")
+        return song_url
+
+    params = {'types': 'songs', 'limit': 1}
     for song in possible_songs:
-        params = {'term': f'{artist} {song}', 'types': 'songs', 'limit': 1}
-        response = requests.get(url, headers=headers, params=params)
-        rate_limit()
+        params['term'] = f'{artist} {song}'
+        response = api_get(APPLE_MUSIC_RATE_LIMITER, APPLE_MUSIC_SEARCH_URL, headers=headers, params=params)
 
         if response.status_code == 200:
-            data = response.json()
+            data = response_json(response)
             if 'songs' in data['results'] and data['results']['songs']['data']:
                 song_data = data['results']['songs']['data'][0]
                 song_url = song_data['attributes']['url']
@@ -254,12 +656,16 @@ def get_apple_music_link(artist, album, possible_songs, token):
                 return song_url
 
     # If no album or track found, fallback to artist page
+    if 'artists' in bulk_results and bulk_results['artists']['data']:
+        artist_url = bulk_results['artists']['data'][0]['attributes']['url']
+        logging.info(f"Found Apple Music artist: {artist} - {artist_url}")
+        return artist_url
+
     params = {'term': f'{artist}', 'types': 'artists', 'limit': 1}
-    response = requests.get(url, headers=headers, params=params)
-    rate_limit()
+    response = api_get(APPLE_MUSIC_RATE_LIMITER, APPLE_MUSIC_SEARCH_URL, headers=headers, params=params)
 
     if response.status_code == 200:
-        data = response.json()
+        data = response_json(response)
         if 'artists' in data['results'] and data['results']['artists']['data']:
             artist_data = data['results']['artists']['data'][0]
             artist_url = artist_data['attributes']['url']
@@ -269,64 +675,74 @@ def get_apple_music_link(artist, album, possible_songs, token):
     logging.error(f"Failed to fetch from Apple Music. Status code: {response.status_code}")
     return None
 
-def get_spotify_link(artist, album, possible_songs, spotify_token):
-    """Search for an album, tracks, or artist on Spotify and return the link."""
-    headers = {"Authorization": f"Bearer {spotify_token}"}
-    search_url = "https://api.spotify.com/v1/search"
-    artist_list = artist.split("&")
+def get_spotify_artist_link(artist_name):
+    """Search for an artist page on Spotify, reusing the result for later albums by the same artist."""
+    key = ("spotify", artist_name.lower())
+    if key not in _ARTIST_LINK_CACHE:
+        params = {"q": f"artist:{artist_name}", "type": "artist", "limit": 1}
+        response = spotify_get(SPOTIFY_SEARCH_URL, params=params)
+        if response.status_code != 200:
+            return None
+        items = response_json(response)['artists']['items']
+        _ARTIST_LINK_CACHE[key] = items[0]['external_urls']['spotify'] if items else None
+    return _ARTIST_LINK_CACHE[key]
+
+@cached_lookup("spotify_link")
+def get_spotify_link(artist, album, possible_songs):
+    """Search for an album, tracks, or artist on Spotify and return the link, the album's tracks, and the matched preview URL."""
+    artist_list = split_artists(artist)
     spotify_tracks = []
+    album_params = {"type": "album", "limit": 5}  # Limit results
+    track_params = {"type": "track", "limit": 5}
 
     # Improve search with partial matches and variant handling
     for artist_name in artist_list:
-        artist_name = artist_name.strip()
-
         try:
             # First try full album name with variants
-            for variant in [album] + [f"{album} {suffix}" for suffix in TITLE_VARIANTS]:
-                params = {"q": f"album:{variant} artist:{artist_name}", "type": "album", "limit": 5}  # Limit results
-                response = requests.get(search_url, headers=headers, params=params)
-                rate_limit()
+            no_results_key = ("spotify", artist_name.lower(), album.lower())
+            for variant in title_variants(album):
+                if no_results_key in _NO_ALBUM_RESULTS:
+                    break
+                album_params["q"] = f"album:{variant} artist:{artist_name}"
+                response = spotify_get(SPOTIFY_SEARCH_URL, params=album_params)
 
                 if response.status_code == 200:
-                    data = response.json()
-                    if data['albums']['items']:
-                        for album_data in data['albums']['items']:
-                            album_name = album_data['name']
-                            artist_result_name = album_data['artists'][0]['name']
-
-                            # Use more flexible fuzzy matching for the album title and strict for artist
-                            if fuzzy_match(album, album_name, threshold=80) and fuzzy_match(artist_name, artist_result_name, threshold=90):
-                                album_id = album_data['id']
-                                album_tracks_response = requests.get(f"https://api.spotify.com/v1/albums/{album_id}/tracks", headers=headers)
-                                if album_tracks_response.status_code == 200:
-                                    album_tracks_data = album_tracks_response.json()
-                                    for track in album_tracks_data['items']:
-                                        spotify_tracks.append(track['name'])
-                                    logging.info(f"Found Spotify album link for '{artist_name}' - '{album}': {album_data['external_urls']['spotify']}")
-                                    return album_data['external_urls']['spotify'], spotify_tracks
+                    data = response_json(response)
+                    items = data['albums']['items']
+                    if variant == album and not items:
+                        _NO_ALBUM_RESULTS.add(no_results_key)
+                    if items:
+                        # Use more flexible fuzzy matching for the album title and strict for artist
+                        titles = [a['name'] for a in items]
+                        artists = [a['artists'][0]['name'] for a in items]
+                        for index in match_releases(album, artist_name, titles, artists, album_threshold=80, artist_threshold=90):
+                            album_data = items[index]
+                            album_id = album_data['id']
+                            album_tracks = fetch_spotify_album_tracks(album_id)
+                            if album_tracks is not None:
+                                spotify_tracks.extend(album_tracks[0])
+                                logging.info(f"Found Spotify album link for '{artist_name}' - '{album}': {album_data['external_urls']['spotify']}")
+                                return album_data['external_urls']['spotify'], spotify_tracks, album_tracks[1]
 
             # If no results found, broaden the search by looking for album name only
-            params = {"q": f"album:{album}", "type": "album", "limit": 5}
-            response = requests.get(search_url, headers=headers, params=params)
-            rate_limit()
+            album_params["q"] = f"album:{album}"
+            response = spotify_get(SPOTIFY_SEARCH_URL, params=album_params)
 
             if response.status_code == 200:
-                data = response.json()
-                if data['albums']['items']:
-                    for album_data in data['albums']['items']:
-                        album_name = album_data['name']
-                        artist_result_name = album_data['artists'][0]['name']
-
-                        # Again, fuzzy match album with a broader match for artist name
-                        if fuzzy_match(album, album_name, threshold=85) and fuzzy_match(artist_name, artist_result_name, threshold=85):
-                            album_id = album_data['id']
-                            album_tracks_response = requests.get(f"https://api.spotify.com/v1/albums/{album_id}/tracks", headers=headers)
-                            if album_tracks_response.status_code == 200:
-                                album_tracks_data = album_tracks_response.json()
-                                for track in album_tracks_data['items']:
-                                    spotify_tracks.append(track['name'])
-                                logging.info(f"Found Spotify album link (broader search) for '{artist_name}' - '{album}': {album_data['external_urls']['spotify']}")
-                                return album_data['external_urls']['spotify'], spotify_tracks
+                data = response_json(response)
+                items = data['albums']['items']
+                if items:
+                    # Again, fuzzy match album with a broader match for artist name
+                    titles = [a['name'] for a in items]
+                    artists = [a['artists'][0]['name'] for a in items]
+                    for index in match_releases(album, artist_name, titles, artists, album_threshold=85, artist_threshold=85):
+                        album_data = items[index]
+                        album_id = album_data['id']
+                        album_tracks = fetch_spotify_album_tracks(album_id)
+                        if album_tracks is not None:
+                            spotify_tracks.extend(album_tracks[0])
+                            logging.info(f"Found Spotify album link (broader search) for '{artist_name}' - '{album}': {album_data['external_urls']['spotify']}")
+                            return album_data['external_urls']['spotify'], spotify_tracks, album_tracks[1]
 
         except Exception as e:
             logging.error(f"Error fetching Spotify album link for '{artist_name}' - '{album}': {e}")
@@ -334,147 +750,191 @@ def get_spotify_link(artist, album, possible_songs, spotify_token):
     # Try searching for individual tracks
     for song in possible_songs:
         for artist_name in artist_list:
-            artist_name = artist_name.strip()
             try:
-                params = {"q": f"track:{song} artist:{artist_name}", "type": "track", "limit": 5}
-                response = requests.get(search_url, headers=headers, params=params)
-                rate_limit()
+                track_params["q"] = f"track:{song} artist:{artist_name}"
+                response = spotify_get(SPOTIFY_SEARCH_URL, params=track_params)
 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = response_json(response)
                     if data['tracks']['items']:
                         logging.info(f"Found Spotify track link for '{artist_name}' - '{song}': {data['tracks']['items'][0]['external_urls']['spotify']}")
-                        return data['tracks']['items'][0]['external_urls']['spotify'], spotify_tracks
+                        return data['tracks']['items'][0]['external_urls']['spotify'], spotify_tracks, data['tracks']['items'][0].get('preview_url')
             except Exception as e:
                 logging.error(f"Error fetching Spotify track link for '{artist_name}' - '{song}': {e}")
 
     # Final fallback: search for artist page
     for artist_name in artist_list:
-        artist_name = artist_name.strip()
         try:
-            params = {"q": f"artist:{artist_name}", "type": "artist", "limit": 1}
-            response = requests.get(search_url, headers=headers, params=params)
-            rate_limit()
-
-            if response.status_code == 200:
-                data = response.json()
-                if data['artists']['items']:
-                    logging.info(f"Found Spotify artist page link for '{artist_name}': {data['artists'][0]['external_urls']['spotify']}")
-                    return data['artists'][0]['external_urls']['spotify'], spotify_tracks
+            artist_url = get_spotify_artist_link(artist_name)
+            if artist_url:
+                logging.info(f"Found Spotify artist page link for '{artist_name}': {artist_url}")
+                return artist_url, spotify_tracks, None
         except Exception as e:
             logging.error(f"Error fetching Spotify artist link for '{artist_name}': {e}")
 
     logging.info(f"No Spotify link found for '{artist}' - '{album}'")
-    return None, spotify_tracks
-
+    return None, spotify_tracks, None
+
+def get_deezer_artist_link(artist_name):
+    """Search for an artist page on Deezer, reusing the result for later albums by the same artist."""
+    key = ("deezer", artist_name.lower())
+    if key not in _ARTIST_LINK_CACHE:
+        response = api_get(DEEZER_RATE_LIMITER, DEEZER_ARTIST_SEARCH_URL, params={"q": artist_name})
+        if response.status_code != 200:
+            return None
+        data = response_json(response).get('data')
+        _ARTIST_LINK_CACHE[key] = data[0]['link'] if data else None
+    return _ARTIST_LINK_CACHE[key]
+
+@cached_lookup("deezer_link")
 def get_deezer_link(artist, album, possible_songs):
-    """Search for an album, tracks, or artist on Deezer and return the link."""
+    """Search for an album, tracks, or artist on Deezer and return the link, the album's tracks, and the matched preview URL."""
     deezer_tracks = []
 
-    def is_valid_match(result_album_name, result_artist_name, target_album_name, target_artist_name):
-        return (fuzzy_match(target_album_name, result_album_name) and fuzzy_match(target_artist_name, result_artist_name))
-
-    artist_list = artist.split("&")
+    artist_list = split_artists(artist)
 
     # Search for album using variants
     for artist_name in artist_list:
-        artist_name = artist_name.strip()
-
-        for variant in [album] + [f"{album} {suffix}" for suffix in TITLE_VARIANTS]:
-            response = requests.get(f"{DEEZER_API_URL}search/album?q=artist:'{artist_name}' album:'{variant}'")
-            rate_limit()
+        artist_query = f'artist:"{artist_name}"'
+        no_results_key = ("deezer", artist_name.lower(), album.lower())
+        for variant in title_variants(album):
+            if no_results_key in _NO_ALBUM_RESULTS:
+                break
+            response = api_get(DEEZER_RATE_LIMITER, DEEZER_ALBUM_SEARCH_URL, params={"q": f'{artist_query} album:"{variant}"'})
 
             if response.status_code == 200:
-                data = response.json()
+                data = response_json(response)
+                if variant == album and not data.get('data'):
+                    _NO_ALBUM_RESULTS.add(no_results_key)
                 if 'data' in data and data['data']:
                     sorted_data = sorted(data['data'], key=lambda x: x.get('release_date', ''), reverse=True)
 
-                    for album_data in sorted_data:
-                        deezer_album = album_data['title']
-                        deezer_artist = album_data['artist']['name']
-
-                        if is_valid_match(deezer_album, deezer_artist, album, artist_name):
-                            album_id = album_data['id']
-                            album_tracks_response = requests.get(f"{DEEZER_API_URL}album/{album_id}")
-                            if album_tracks_response.status_code == 200:
-                                album_tracks_data = album_tracks_response.json()
-                                for track in album_tracks_data['tracks']['data']:
-                                    deezer_tracks.append(track['title'])
-                            logging.info(f"Found Deezer album link for '{artist_name}' - '{album}': {album_data['link']}")
-                            return album_data['link'], deezer_tracks
+                    titles = [a['title'] for a in sorted_data]
+                    artists = [a['artist']['name'] for a in sorted_data]
+                    for index in match_releases(album, artist_name, titles, artists):
+                        album_data = sorted_data[index]
+                        album_id = album_data['id']
+                        album_tracks = fetch_deezer_album_tracks(album_id)
+                        if album_tracks is not None:
+                            deezer_tracks.extend(album_tracks[0])
+                        logging.info(f"Found Deezer album link for '{artist_name}' - '{album}': {album_data['link']}")
+                        return album_data['link'], deezer_tracks, album_tracks[1] if album_tracks else None
 
     # If no album found, search for individual tracks from possible_songs
     for song in possible_songs:
         for artist_name in artist_list:
-            artist_name = artist_name.strip()
-            response = requests.get(f"{DEEZER_API_URL}search/track?q=artist:'{artist_name}' track:'{song}'")
-            rate_limit()
+            response = api_get(DEEZER_RATE_LIMITER, DEEZER_TRACK_SEARCH_URL, params={"q": f'artist:"{artist_name}" track:"{song}"'})
 
             if response.status_code == 200:
-                data = response.json()
+                data = response_json(response)
                 if 'data' in data and data['data']:
                     track_data = data['data'][0]
                     track_url = track_data['link']
                     track_name = track_data['title']
                     logging.info(f"Found Deezer track link for '{track_name}' by {artist_name} - {track_url}")
-                    return track_url, deezer_tracks
+                    return track_url, deezer_tracks, track_data.get('preview')
 
     # Fallback: search for artist page
     for artist_name in artist_list:
-        artist_name = artist_name.strip()
         try:
-            response = requests.get(f"{DEEZER_API_URL}search/artist?q={artist_name}")
-            rate_limit()
-
-            if response.status_code == 200:
-                data = response.json()
-                if 'data' in data and data['data']:
-                    artist_data = data['data'][0]
-                    artist_url = artist_data['link']
-                    logging.info(f"Found Deezer artist page link for '{artist_name}': {artist_url}")
-                    return artist_url, deezer_tracks
+            artist_url = get_deezer_artist_link(artist_name)
+            if artist_url:
+                logging.info(f"Found Deezer artist page link for '{artist_name}': {artist_url}")
+                return artist_url, deezer_tracks, None
         except Exception as e:
             logging.error(f"Error fetching Deezer artist link for '{artist_name}': {e}")
 
     logging.info(f"No Deezer link found for '{artist}' - '{album}'")
-    return None, deezer_tracks
-
-def update_json_with_links(file_path):
-    """Reads a JSON file, updates it with Spotify, Deezer, Apple Music, and preview links, and saves the updated JSON."""
-    with open(file_path, 'r') as file:
-        data = json.load(file)
-
-    spotify_token = authenticate_spotify()
-    apple_music_token = authenticate_apple_music()
-
-    for album_data in data:
-        artist = album_data['artist']
-        album = album_data['album']
-
-        possible_songs = []  # Add function to fetch possible songs from MusicBrainz or Discogs if needed
-        spotify_link, spotify_tracks = get_spotify_link(artist, album, possible_songs, spotify_token)
+    return None, deezer_tracks, None
+
+def process_album(album_data):
+    """Updates a single album entry with Spotify, Deezer, Apple Music, and preview links."""
+    artist = album_data['artist']
+    album = album_data['album']
+    # Long runs outlive a single JWT, so fetch the cached token per album
+    apple_music_token = get_apple_music_token()
+
+    songs, tracklist_failed = tracked_lookup(search_musicbrainz_for_album, artist, album)
+    possible_songs = unique_songs(songs)
+
+    # The lookups hit different APIs with separate rate limits, so run them side by side.
+    # Results built on a tracklist that could not be fetched are not cached, so the next run redoes them
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        spotify_future = executor.submit(tracked_lookup, get_spotify_link, artist, album, possible_songs, cache_result=not tracklist_failed)
+        deezer_future = executor.submit(tracked_lookup, get_deezer_link, artist, album, possible_songs, cache_result=not tracklist_failed)
+        apple_music_future = executor.submit(get_apple_music_link, artist, album, possible_songs, apple_music_token, cache_result=not tracklist_failed)
+
+        (spotify_link, spotify_tracks, spotify_preview), spotify_failed = spotify_future.result()
         album_data['spotify_link'] = spotify_link
 
-        deezer_link, deezer_tracks = get_deezer_link(artist, album, possible_songs)
+        (deezer_link, deezer_tracks, deezer_preview), deezer_failed = deezer_future.result()
         album_data['deezer_link'] = deezer_link
 
-        apple_music_link = get_apple_music_link(artist, album, possible_songs, apple_music_token)
-        album_data['apple_music_link'] = apple_music_link
-
-        preview_url = get_music_preview_link(artist, album, possible_songs, apple_music_token, spotify_token)
-        album_data['preview_link'] = preview_url
-
-        possible_songs += spotify_tracks + deezer_tracks
-
-    with open(file_path, 'w') as file:
-        json.dump(data, file, indent=2)
-
+        # The tracklists the link lookups found give the preview song searches something to work with
+        # when MusicBrainz had no release, and only Deezer and Spotify previews not found yet are searched again
+        possible_songs = unique_songs(possible_songs + spotify_tracks + deezer_tracks)
+        album_data['preview_link'] = get_music_preview_link(artist, album, possible_songs, apple_music_token, deezer_preview, spotify_preview,
+                                                            cache_result=not (tracklist_failed or spotify_failed or deezer_failed))
+        album_data['apple_music_link'] = apple_music_future.result()
+
+    return album_data
+
+def dump_album(album_data) -> bytes:
+    """Serialize one album entry as UTF-8, indented to sit inside the output array, using orjson when it is installed."""
+    if orjson is not None:
+        data = orjson.dumps(album_data, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(album_data, indent=2, ensure_ascii=False).encode('utf-8')
+    return b"  " + data.replace(b"\n", b"\n  ")
+
+def enrich_albums(executor, albums, window):
+    """Yields enriched albums in input order while keeping at most `window` albums in flight."""
+    pending = deque()
+    for album_data in albums:
+        pending.append(executor.submit(process_album, album_data))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def update_json_with_links(file_path, max_workers=4):
+    """Streams albums from a JSON file, updates them with Spotify, Deezer, Apple Music, and preview links, and saves the updated JSON."""
+    # Sign the first token up front so a missing or broken private key fails before any work is done
+    get_apple_music_token()
+    temp_path = f"{file_path}.tmp"
+
+    # Read albums lazily and write each one as soon as it is done, so memory stays flat on large files
+    # and the original file is only replaced once every album has been written
+    with open(file_path, 'rb') as infile:
+        # ijson yields no albums for anything but a top-level array, which would replace the file with an empty one
+        if next(ijson.parse(infile), None) != ('', 'start_array', None):
+            raise ValueError(f"{file_path} must contain a JSON array of albums")
+
+    try:
+        with open(file_path, 'rb') as infile, open(temp_path, 'wb') as outfile:
+            albums = ijson.items(infile, 'item', use_float=True)
+            separator = b"[\n"
+            # Albums are independent, so process several at once; the per-API rate limits are shared across threads
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for album_data in enrich_albums(executor, albums, max_workers * 2):
+                    outfile.write(separator + dump_album(album_data))
+                    outfile.flush()
+                    separator = b",\n"
+            outfile.write(b"[]" if separator == b"[\n" else b"\n]")
+
+        os.replace(temp_path, file_path)
+    except BaseException:
+        # Leave no half-written temp file behind; the original file is still untouched
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
     logging.info(f"Updated JSON saved to {file_path}")
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Update JSON with Spotify, Deezer, and Apple Music links")
     parser.add_argument("file_path", help="Path to the JSON file")
+    parser.add_argument("--workers", type=int, default=4, help="Number of albums to process concurrently")
     args = parser.parse_args()
 
-    update_json_with_links(args.file_path)
+    update_json_with_links(args.file_path, args.workers)
\ No newline at end of file
@@ -0,0 +1,276 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MUSIC_LINKS_CACHE_DIR", tempfile.mkdtemp())
+
+import music_links_enricher as mle
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self.content = json.dumps(payload).encode()
+        self.text = self.content.decode()
+        self.headers = {}
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FetchSpotifyAlbumTracksTest(unittest.TestCase):
+    def setUp(self):
+        mle._RESPONSE_CACHE.clear()
+        mle._SPOTIFY_ALBUM_CACHE.clear()
+
+    def test_fetches_tracklist_without_query_params(self):
+        payload = {"items": [{"name": "Intro", "preview_url": None}, {"name": "Song", "preview_url": "https://p.scdn.co/song"}]}
+        with mock.patch.object(mle, "get_spotify_token", return_value="token"), \
+                mock.patch.object(mle._SPOTIFY_SESSION, "get", return_value=FakeResponse(200, payload)) as get:
+            result = mle.fetch_spotify_album_tracks("album-id")
+
+        self.assertEqual(result, (["Intro", "Song"], "https://p.scdn.co/song"))
+        get.assert_called_once_with(mle.SPOTIFY_ALBUM_TRACKS_URL.format("album-id"), params=None)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_blocks_once_the_window_is_full(self):
+        limiter = mle.RateLimiter(2, 0.2)
+        start = time.monotonic()
+        for _ in range(3):
+            with limiter:
+                pass
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    def test_calls_within_the_budget_do_not_wait(self):
+        limiter = mle.RateLimiter(3, 10.0)
+        start = time.monotonic()
+        for _ in range(3):
+            with limiter:
+                pass
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_pause_holds_back_the_next_request(self):
+        limiter = mle.RateLimiter(100)
+        limiter.pause(0.2)
+        start = time.monotonic()
+        with limiter:
+            pass
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+
+class ApiGetTest(unittest.TestCase):
+    def setUp(self):
+        mle._RESPONSE_CACHE.clear()
+
+    def test_identical_requests_are_served_from_the_parsed_cache(self):
+        limiter = mle.RateLimiter(100)
+        session = mock.Mock()
+        session.get.return_value = FakeResponse(200, {"data": [1]})
+        first = mle.api_get(limiter, "https://api.example/search", session=session, params={"q": "x"})
+        second = mle.api_get(limiter, "https://api.example/search", session=session, params={"q": "x"})
+
+        session.get.assert_called_once()
+        self.assertIs(first, second)
+        self.assertIsInstance(first, mle.CachedResponse)
+        self.assertEqual(mle.response_json(first), {"data": [1]})
+
+
+    def test_waits_out_a_429_and_retries(self):
+        limiter = mle.RateLimiter(100)
+        rate_limited = FakeResponse(429, {})
+        rate_limited.headers = {"Retry-After": "0.5"}
+        session = mock.Mock()
+        session.get.side_effect = [rate_limited, FakeResponse(200, {"data": []})]
+        with mock.patch.object(limiter, "pause") as pause:
+            response = mle.api_get(limiter, "https://api.example/search", session=session, params={"q": "y"})
+
+        pause.assert_called_once_with(0.5)
+        self.assertEqual(session.get.call_count, 2)
+        self.assertEqual(response.status_code, 200)
+
+    def test_gives_up_after_repeated_429s(self):
+        limiter = mle.RateLimiter(100)
+        session = mock.Mock()
+        session.get.return_value = FakeResponse(429, {})
+        with mock.patch.object(limiter, "pause"):
+            response = mle.api_get(limiter, "https://api.example/search", session=session, params={"q": "z"})
+
+        self.assertEqual(session.get.call_count, 3)
+        self.assertEqual(response.status_code, 429)
+
+
+class FuzzyMatchingTest(unittest.TestCase):
+    def test_subset_of_words_does_not_match(self):
+        self.assertEqual(mle.fuzzy_scores("Kings of Leon", ["Leon", "Of"], 90), {})
+
+    def test_title_containing_the_query_matches(self):
+        self.assertIn(0, mle.fuzzy_scores("Abbey Road", ["Abbey Road (Super Deluxe)"]))
+
+    def test_exact_title_outranks_a_longer_title_containing_it(self):
+        titles = ["Abbey Road (Super Deluxe)", "Abbey Road"]
+        self.assertEqual(mle.match_releases("Abbey Road", "The Beatles", titles, ["The Beatles", "The Beatles"]), [1, 0])
+
+    def test_requires_both_title_and_artist(self):
+        titles = ["Hits", "Greatest Hits"]
+        artists = ["Queen Latifah", "Queen"]
+        self.assertEqual(mle.match_releases("Greatest Hits", "Queen", titles, artists), [1])
+
+    def test_ranks_by_combined_title_and_artist_score(self):
+        titles = ["Abbey Road", "Abbey Road", "Abbey Road (Remastered)"]
+        artists = ["The Beatles Tribute Band", "The Beatles", "The Beatles"]
+        self.assertEqual(mle.match_releases("Abbey Road", "The Beatles", titles, artists), [1, 0, 2])
+
+    def test_ties_keep_the_api_order(self):
+        self.assertEqual(mle.match_releases("Abbey Road", "The Beatles", ["Abbey Road", "Abbey Road"], ["The Beatles", "The Beatles"]), [0, 1])
+
+    def test_rejects_a_partial_title(self):
+        self.assertEqual(mle.match_releases("Abbey Road", "The Beatles", ["Road"], ["The Beatles"]), [])
+
+
+class NoAlbumResultsTest(unittest.TestCase):
+    def setUp(self):
+        mle._RESPONSE_CACHE.clear()
+        mle._NO_ALBUM_RESULTS.clear()
+
+    def test_empty_plain_title_search_skips_the_variants(self):
+        with mock.patch.object(mle._SESSION, "get", return_value=FakeResponse(200, {"data": []})) as get:
+            self.assertIsNone(mle.get_deezer_preview("Artist", "Album", []))
+            self.assertEqual(get.call_count, 1)
+            self.assertIn(("deezer", "artist", "album"), mle._NO_ALBUM_RESULTS)
+
+            mle._RESPONSE_CACHE.clear()
+            self.assertIsNone(mle.get_deezer_preview("Artist", "Album", []))
+            self.assertEqual(get.call_count, 1)
+
+    def test_variants_are_searched_when_the_plain_title_has_results(self):
+        with mock.patch.object(mle._SESSION, "get", return_value=FakeResponse(200, {"data": [{"id": 1}]})) as get, \
+                mock.patch.object(mle, "fetch_deezer_album_tracks", return_value=None):
+            mle.get_deezer_preview("Artist", "Album", [])
+        self.assertEqual(get.call_count, len(mle.title_variants("Album")))
+        self.assertNotIn(("deezer", "artist", "album"), mle._NO_ALBUM_RESULTS)
+
+
+class SplitArtistsTest(unittest.TestCase):
+    def test_splits_joint_credits(self):
+        self.assertEqual(mle.split_artists("Artist A feat. Artist B"), ("Artist A", "Artist B"))
+        self.assertEqual(mle.split_artists("Artist A & Artist B"), ("Artist A", "Artist B"))
+        self.assertEqual(mle.split_artists("Artist A vs. Artist B"), ("Artist A", "Artist B"))
+
+    def test_keeps_band_names_starting_or_ending_with_a_separator_word(self):
+        self.assertEqual(mle.split_artists("Little Feat"), ("Little Feat",))
+        self.assertEqual(mle.split_artists("Ft. Worth Symphony"), ("Ft. Worth Symphony",))
+
+
+class SpotifyTokenTest(unittest.TestCase):
+    def setUp(self):
+        mle._SPOTIFY_TOKEN.update({"token": None, "expires_at": 0.0, "retry_at": 0.0})
+
+    def test_failed_authentication_is_not_retried_per_request(self):
+        with mock.patch.object(mle._SESSION, "post", return_value=FakeResponse(400, {"error": "invalid_client"})) as post:
+            self.assertIsNone(mle.get_spotify_token())
+            self.assertIsNone(mle.get_spotify_token())
+            self.assertIsNone(mle.get_spotify_token(force_refresh=True))
+        post.assert_called_once()
+
+
+class CachedLookupTest(unittest.TestCase):
+    def setUp(self):
+        mle._RESPONSE_CACHE.clear()
+        mle._CACHE.clear()
+
+    def test_failed_request_is_not_cached(self):
+        with mock.patch.object(mle._SESSION, "get", return_value=FakeResponse(503, {})):
+            self.assertEqual(mle.search_musicbrainz_for_album("Artist", "Album"), [])
+        self.assertNotIn("musicbrainz:artist:album", mle._CACHE)
+
+    def test_not_found_is_cached(self):
+        with mock.patch.object(mle._SESSION, "get", return_value=FakeResponse(200, {"releases": []})):
+            self.assertEqual(mle.search_musicbrainz_for_album("Artist", "Album"), [])
+        self.assertEqual(mle._CACHE.get("musicbrainz:artist:album"), [])
+
+    def test_lookup_on_a_failed_tracklist_is_not_cached(self):
+        with mock.patch.object(mle._SESSION, "get", return_value=FakeResponse(200, {"data": []})):
+            mle.get_deezer_link("Artist", "Album", [], cache_result=False)
+        self.assertNotIn("deezer_link:artist:album", mle._CACHE)
+
+    def test_spotify_lookup_is_not_cached_when_authentication_fails(self):
+        mle._SPOTIFY_TOKEN.update({"token": None, "expires_at": 0.0, "retry_at": 0.0})
+        with mock.patch.object(mle._SESSION, "post", side_effect=mle.requests.ConnectionError), \
+                mock.patch.object(mle._SPOTIFY_SESSION, "get", return_value=FakeResponse(401, {})):
+            self.assertEqual(mle.get_spotify_link("Artist", "Album", []), (None, [], None))
+        self.assertNotIn("spotify_link:artist:album", mle._CACHE)
+
+
+class EnrichAlbumsTest(unittest.TestCase):
+    def test_yields_albums_in_input_order(self):
+        def process_album(album_data):
+            time.sleep(album_data["delay"])
+            return album_data
+
+        albums = [{"id": index, "delay": delay} for index, delay in enumerate([0.05, 0.0, 0.03, 0.0])]
+        with mock.patch.object(mle, "process_album", side_effect=process_album), \
+                mle.ThreadPoolExecutor(max_workers=4) as executor:
+            result = list(mle.enrich_albums(executor, iter(albums), window=2))
+        self.assertEqual([album["id"] for album in result], [0, 1, 2, 3])
+
+
+class DumpAlbumTest(unittest.TestCase):
+    def test_indents_the_album_to_sit_inside_the_array(self):
+        expected = '  {\n    "artist": "Motörhead",\n    "tracks": [\n      "Ace of Spades"\n    ]\n  }'.encode()
+        self.assertEqual(mle.dump_album({"artist": "Motörhead", "tracks": ["Ace of Spades"]}), expected)
+
+
+class UpdateJsonWithLinksTest(unittest.TestCase):
+    def test_refuses_to_replace_a_non_array_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "albums.json")
+            with open(file_path, "w") as f:
+                json.dump({"albums": [{"artist": "Artist", "album": "Album"}]}, f)
+
+            with mock.patch.object(mle, "get_apple_music_token", return_value="token"):
+                with self.assertRaises(ValueError):
+                    mle.update_json_with_links(file_path)
+
+            with open(file_path) as f:
+                self.assertEqual(json.load(f), {"albums": [{"artist": "Artist", "album": "Album"}]})
+            self.assertFalse(os.path.exists(f"{file_path}.tmp"))
+
+    def test_writes_every_album_as_a_json_array(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "albums.json")
+            albums = [{"artist": "Artist", "album": "One"}, {"artist": "Artist", "album": "Two"}]
+            with open(file_path, "w") as f:
+                json.dump(albums, f)
+
+            with mock.patch.object(mle, "get_apple_music_token", return_value="token"), \
+                    mock.patch.object(mle, "process_album", side_effect=lambda album_data: {**album_data, "spotify_link": None}):
+                mle.update_json_with_links(file_path)
+
+            with open(file_path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f), [{**album, "spotify_link": None} for album in albums])
+
+    def test_removes_the_temp_file_when_an_album_fails(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "albums.json")
+            albums = [{"artist": "Artist", "album": "Album"}]
+            with open(file_path, "w") as f:
+                json.dump(albums, f)
+
+            with mock.patch.object(mle, "get_apple_music_token", return_value="token"), \
+                    mock.patch.object(mle, "process_album", side_effect=mle.requests.ConnectionError):
+                with self.assertRaises(mle.requests.ConnectionError):
+                    mle.update_json_with_links(file_path)
+
+            with open(file_path) as f:
+                self.assertEqual(json.load(f), albums)
+            self.assertFalse(os.path.exists(f"{file_path}.tmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()